@@ -4,23 +4,179 @@ V4.32 Accuracy Storage System
 Stores predictions and calculates historical accuracy
 """
 
+import logging
 import sqlite3
 import json
-from datetime import datetime, UTC
+import sys
+import threading
+from datetime import datetime, timedelta, UTC
 from pathlib import Path
 from typing import Dict, Optional
 
+logger = logging.getLogger(__name__)
+
+# Database files live next to this module
+_BASE_DIR = Path(__file__).resolve().parent
+
+# Upsert statements for store_v4_data, kept as constants so the
+# connection's statement cache always sees the identical SQL text.
+# ON CONFLICT ... DO UPDATE rewrites the existing row in place, where
+# INSERT OR REPLACE would delete it and insert a new one (new rowid,
+# every index entry rewritten).
+SQL_UPSERT_ANCHOR = '''
+    INSERT INTO daily_anchors
+    (anchor_date, anchor_timestamp, anchor_price, regime, direction, curve_quality, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(anchor_date) DO UPDATE SET
+        anchor_timestamp = excluded.anchor_timestamp,
+        anchor_price = excluded.anchor_price,
+        regime = excluded.regime,
+        direction = excluded.direction,
+        curve_quality = excluded.curve_quality,
+        created_at = excluded.created_at
+'''
+
+SQL_UPSERT_PRED = '''
+    INSERT INTO predictions
+    (anchor_date, horizon, original_price, original_pct,
+     stabilized_price, stabilized_pct, actual_price, actual_pct, became_actual_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(anchor_date, horizon) DO UPDATE SET
+        original_price = excluded.original_price,
+        original_pct = excluded.original_pct,
+        stabilized_price = excluded.stabilized_price,
+        stabilized_pct = excluded.stabilized_pct,
+        actual_price = excluded.actual_price,
+        actual_pct = excluded.actual_pct,
+        became_actual_at = excluded.became_actual_at
+'''
+
+SQL_UPSERT_METRIC = '''
+    INSERT INTO accuracy_metrics
+    (anchor_date, horizon, original_error_pct, stabilized_error_pct,
+     original_accuracy, stabilized_accuracy, calculated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(anchor_date, horizon) DO UPDATE SET
+        original_error_pct = excluded.original_error_pct,
+        stabilized_error_pct = excluded.stabilized_error_pct,
+        original_accuracy = excluded.original_accuracy,
+        stabilized_accuracy = excluded.stabilized_accuracy,
+        calculated_at = excluded.calculated_at
+'''
+
+# Stored values per horizon for one anchor, column order matching the
+# value slice of the upsert rows (everything between horizon and the timestamp)
+SQL_SELECT_PRED_VALUES = '''
+    SELECT horizon, original_price, original_pct, stabilized_price, stabilized_pct,
+           actual_price, actual_pct
+    FROM predictions
+    WHERE anchor_date = ?
+'''
+
+SQL_SELECT_METRIC_VALUES = '''
+    SELECT horizon, original_error_pct, stabilized_error_pct,
+           original_accuracy, stabilized_accuracy
+    FROM accuracy_metrics
+    WHERE anchor_date = ?
+'''
+
+
+# Horizon, overall and regime aggregates for get_accuracy_summary in one
+# statement; sort_key orders horizons by name and regimes by sample count
+# (descending). Bind the cutoff date once per branch.
+SQL_ACCURACY_SUMMARY = '''
+    SELECT 
+        'horizon' as kind,
+        horizon as name,
+        COUNT(*) as count,
+        AVG(original_error_pct) as avg_error,
+        MIN(original_error_pct) as min_error,
+        MAX(original_error_pct) as max_error,
+        AVG(original_accuracy) as avg_accuracy,
+        0 as sort_key
+    FROM accuracy_metrics
+    WHERE calculated_at >= ?
+    GROUP BY horizon
+    UNION ALL
+    SELECT 'overall', NULL, COUNT(*), AVG(original_error_pct), NULL, NULL, NULL, 0
+    FROM accuracy_metrics
+    WHERE calculated_at >= ?
+    UNION ALL
+    SELECT 
+        'regime',
+        da.regime,
+        COUNT(*),
+        AVG(am.original_error_pct),
+        NULL, NULL, NULL,
+        -COUNT(*)
+    FROM accuracy_metrics am
+    JOIN daily_anchors da ON am.anchor_date = da.anchor_date
+    WHERE am.calculated_at >= ?
+    GROUP BY da.regime
+    ORDER BY kind, sort_key, name
+'''
+
 
 class AccuracyStorage:
     """Simple storage for V4.32 predictions and accuracy tracking"""
     
+    __slots__ = ('db_path', '_conn', '_lock', '_read_conn', '_read_lock', '_closed')
+    
     def __init__(self, db_path: str = "v4_accuracy.db"):
-        self.db_path = Path(__file__).parent / db_path
+        self.db_path = _BASE_DIR / db_path
+        # One long-lived connection shared by all writes; the lock serializes access
+        self._conn = self._connect()
+        self._lock = threading.Lock()
         self.init_database()
+        # Separate read-only connection so summaries never wait on the writer (WAL)
+        self._read_conn = self._connect(read_only=True)
+        self._read_lock = threading.Lock()
+        self._closed = False
+    
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a connection with WAL journaling and tuned PRAGMAs"""
+        if read_only:
+            conn = sqlite3.connect(
+                f"{self.db_path.as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+                cached_statements=128,
+            )
+        else:
+            # Autocommit mode: writers open explicit transactions with BEGIN IMMEDIATE
+            conn = sqlite3.connect(
+                self.db_path,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=128,
+            )
+            # Larger pages for the summary range scans; only takes effect when the
+            # database file is first created, so it must precede journal_mode=WAL
+            conn.execute("PRAGMA page_size=8192")
+            # WAL lets readers run alongside the writer; NORMAL only fsyncs at checkpoints
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-8000")
+        return conn
+    
+    def close(self):
+        """Refresh query planner statistics and close the connections (safe to call twice)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            try:
+                self._conn.execute("PRAGMA optimize")
+            finally:
+                self._conn.close()
+        with self._read_lock:
+            self._read_conn.close()
     
     def init_database(self):
         """Initialize SQLite database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn
         cursor = conn.cursor()
         
         # Store daily anchors with original predictions
@@ -70,8 +226,19 @@ class AccuracyStorage:
             )
         ''')
         
-        conn.commit()
-        conn.close()
+        # Covering indexes for the calculated_at range scans in get_accuracy_summary
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_metrics_calc_horizon
+            ON accuracy_metrics(calculated_at, horizon, original_error_pct, original_accuracy)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_metrics_calc_anchor
+            ON accuracy_metrics(calculated_at, anchor_date, original_error_pct)
+        ''')
+        # Lookups on daily_anchors go through its anchor_date primary key; drop the
+        # redundant (anchor_date, regime) index that earlier versions created
+        cursor.execute('DROP INDEX IF EXISTS idx_anchors_regime')
+        
         print(f"✅ Accuracy database initialized: {self.db_path}")
     
     def store_v4_data(self, curve_data: Dict):
@@ -86,177 +253,170 @@ class AccuracyStorage:
         # Extract anchor date (YYYY-MM-DD)
         anchor_date = anchor_timestamp.split('T')[0]
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # All rows written by one call share the same write timestamp
+        now_iso = datetime.now(UTC).isoformat()
+        
+        anchor_row = (
+            anchor_date,
+            anchor_timestamp,
+            curve_data.get('current_price', 0),
+            curve_data.get('regime', 'UNKNOWN'),
+            curve_data.get('direction', 'UNKNOWN'),
+            curve_data.get('curve_quality', 0),
+            now_iso
+        )
         
+        # Rows are built outside the lock; a malformed curve is reported like a failed write
         try:
-            # Store anchor info
-            cursor.execute('''
-                INSERT OR REPLACE INTO daily_anchors
-                (anchor_date, anchor_timestamp, anchor_price, regime, direction, curve_quality, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                anchor_date,
-                anchor_timestamp,
-                curve_data.get('current_price', 0),
-                curve_data.get('regime', 'UNKNOWN'),
-                curve_data.get('direction', 'UNKNOWN'),
-                curve_data.get('curve_quality', 0),
-                datetime.now(UTC).isoformat()
-            ))
-            
             # Store predictions for each horizon
             # Match UI structure: curve_data has 'curve' array OR 'forward_curve' dict
             forward_curve = curve_data.get('curve', [])
-            if not forward_curve:
-                # Convert forward_curve dict to array format
+            if forward_curve:
+                points = (
+                    (
+                        point.get('horizon'),
+                        point.get('target_price', 0),
+                        point.get('pct_change', 0),
+                        point.get('is_actual', False)
+                    )
+                    for point in forward_curve
+                )
+            else:
+                # Read the forward_curve dict in place rather than converting it to an array
                 fc_dict = curve_data.get('forward_curve', {})
-                forward_curve = [
-                    {
-                        'horizon': horizon,
-                        'target_price': data.get('price'),
-                        'pct_change': data.get('pct_change'),
-                        'is_actual': data.get('is_actual', False)
-                    }
+                points = (
+                    (horizon, data.get('price'), data.get('pct_change'), data.get('is_actual', False))
                     for horizon, data in fc_dict.items()
-                ]
-            
+                )
+        
             original_preds = curve_data.get('original_predictions', {})
-            
-            for point in forward_curve:
-                horizon = point.get('horizon')
+        
+            # Collect rows first so each table gets a single executemany
+            prediction_rows: list[tuple] = []
+            metric_rows: list[tuple] = []
+            add_prediction = prediction_rows.append
+            add_metric = metric_rows.append
+            for horizon, target_price, pct_change, is_actual in points:
                 if not horizon:
                     continue
-                
-                target_price = point.get('target_price', 0)
-                pct_change = point.get('pct_change', 0)
-                is_actual = point.get('is_actual', False)
-                
+            
                 # Get original prediction
                 orig = original_preds.get(horizon, {})
                 original_price = orig.get('original_price')
                 original_pct = orig.get('original_pct')
                 stabilized_price = orig.get('stabilized_price')
                 stabilized_pct = orig.get('stabilized_pct')
-                
+            
                 # Only store if we have original prediction
-                if original_price:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO predictions
-                        (anchor_date, horizon, original_price, original_pct, 
-                         stabilized_price, stabilized_pct, actual_price, actual_pct, became_actual_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
+                if not original_price:
+                    continue
+            
+                add_prediction((
+                    anchor_date,
+                    horizon,
+                    original_price,
+                    original_pct,
+                    stabilized_price,
+                    stabilized_pct,
+                    target_price if is_actual else None,
+                    pct_change if is_actual else None,
+                    now_iso if is_actual else None
+                ))
+            
+                # Calculate accuracy if actual
+                if is_actual and target_price > 0:
+                    # One division per point, shared by both error calculations
+                    pct_scale = 100 / target_price
+                    original_error_pct = abs(target_price - original_price) * pct_scale
+                    original_accuracy = 100 - original_error_pct
+                
+                    stabilized_error_pct = None
+                    stabilized_accuracy = None
+                    if stabilized_price:
+                        stabilized_error_pct = abs(target_price - stabilized_price) * pct_scale
+                        stabilized_accuracy = 100 - stabilized_error_pct
+                
+                    add_metric((
                         anchor_date,
                         horizon,
-                        original_price,
-                        original_pct,
-                        stabilized_price,
-                        stabilized_pct,
-                        target_price if is_actual else None,
-                        pct_change if is_actual else None,
-                        datetime.now(UTC).isoformat() if is_actual else None
+                        original_error_pct,
+                        stabilized_error_pct,
+                        original_accuracy,
+                        stabilized_accuracy,
+                        now_iso
                     ))
-                    
-                    # Calculate accuracy if actual
-                    if is_actual and target_price > 0:
-                        original_error = abs(target_price - original_price)
-                        original_error_pct = (original_error / target_price) * 100
-                        original_accuracy = 100 - original_error_pct
-                        
-                        stabilized_error_pct = None
-                        stabilized_accuracy = None
-                        if stabilized_price:
-                            stabilized_error = abs(target_price - stabilized_price)
-                            stabilized_error_pct = (stabilized_error / target_price) * 100
-                            stabilized_accuracy = 100 - stabilized_error_pct
-                        
-                        cursor.execute('''
-                            INSERT OR REPLACE INTO accuracy_metrics
-                            (anchor_date, horizon, original_error_pct, stabilized_error_pct,
-                             original_accuracy, stabilized_accuracy, calculated_at)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            anchor_date,
-                            horizon,
-                            original_error_pct,
-                            stabilized_error_pct,
-                            original_accuracy,
-                            stabilized_accuracy,
-                            datetime.now(UTC).isoformat()
-                        ))
-                        
-                        print(f"✅ Stored accuracy: {anchor_date} {horizon} - {original_accuracy:.2f}%")
-            
-            conn.commit()
         except Exception as e:
             print(f"❌ Error storing V4 data: {e}")
-            conn.rollback()
-        finally:
-            conn.close()
+            return
+        
+        with self._lock:
+            conn = self._conn
+            cursor = conn.cursor()
+            
+            try:
+                # Take the write lock up front so the whole batch is one transaction
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute(SQL_UPSERT_ANCHOR, anchor_row)
+                # Most polls repeat the previous curve; only write rows whose values changed
+                prediction_rows = self._changed_rows(cursor, SQL_SELECT_PRED_VALUES, anchor_date, prediction_rows)
+                metric_rows = self._changed_rows(cursor, SQL_SELECT_METRIC_VALUES, anchor_date, metric_rows)
+                if prediction_rows:
+                    cursor.executemany(SQL_UPSERT_PRED, prediction_rows)
+                if metric_rows:
+                    cursor.executemany(SQL_UPSERT_METRIC, metric_rows)
+                cursor.execute("COMMIT")
+            except Exception as e:
+                print(f"❌ Error storing V4 data: {e}")
+                if conn.in_transaction:
+                    cursor.execute("ROLLBACK")
+                return
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            for _, horizon, _, _, original_accuracy, _, _ in metric_rows:
+                logger.debug("Stored accuracy: %s %s - %.2f%%", anchor_date, horizon, original_accuracy)
+    
+    @staticmethod
+    def _changed_rows(cursor: sqlite3.Cursor, select_sql: str, anchor_date: str, rows: list[tuple]) -> list[tuple]:
+        """Drop upsert rows whose stored values already match (timestamps ignored)"""
+        if not rows:
+            return rows
+        stored = {row[0]: row[1:] for row in cursor.execute(select_sql, (anchor_date,))}
+        if not stored:
+            return rows
+        return [row for row in rows if stored.get(row[1]) != row[2:-1]]
     
     def get_accuracy_summary(self, days: int = 30) -> Dict:
         """Get accuracy summary for last N days"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Overall accuracy by horizon
-        cursor.execute('''
-            SELECT 
-                horizon,
-                COUNT(*) as count,
-                AVG(original_error_pct) as avg_error,
-                MIN(original_error_pct) as min_error,
-                MAX(original_error_pct) as max_error,
-                AVG(original_accuracy) as avg_accuracy
-            FROM accuracy_metrics
-            WHERE calculated_at >= date('now', '-' || ? || ' days')
-            GROUP BY horizon
-            ORDER BY horizon
-        ''', (days,))
-        
-        horizon_stats = {}
-        for row in cursor.fetchall():
-            horizon, count, avg_err, min_err, max_err, avg_acc = row
-            horizon_stats[horizon] = {
-                'count': count,
-                'mape': round(avg_err, 3),
-                'min_error': round(min_err, 3),
-                'max_error': round(max_err, 3),
-                'accuracy': round(avg_acc, 2)
-            }
-        
-        # Overall MAPE
-        cursor.execute('''
-            SELECT AVG(original_error_pct) as overall_mape
-            FROM accuracy_metrics
-            WHERE calculated_at >= date('now', '-' || ? || ' days')
-        ''', (days,))
-        
-        overall_mape = cursor.fetchone()[0] or 0
-        
-        # Accuracy by regime
-        cursor.execute('''
-            SELECT 
-                da.regime,
-                COUNT(*) as count,
-                AVG(am.original_error_pct) as avg_error
-            FROM accuracy_metrics am
-            JOIN daily_anchors da ON am.anchor_date = da.anchor_date
-            WHERE am.calculated_at >= date('now', '-' || ? || ' days')
-            GROUP BY da.regime
-            ORDER BY count DESC
-        ''', (days,))
-        
-        regime_stats = {}
-        for row in cursor.fetchall():
-            regime, count, avg_err = row
-            regime_stats[regime] = {
-                'count': count,
-                'mape': round(avg_err, 3)
-            }
-        
-        conn.close()
+        # Same value SQLite's date('now', '-N days') yields, bound as a literal
+        cutoff = (datetime.now(UTC).date() - timedelta(days=days)).isoformat()
+        with self._read_lock:
+            cursor = self._read_conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            
+            cursor.execute(SQL_ACCURACY_SUMMARY, (cutoff, cutoff, cutoff))
+            
+            overall_mape = 0
+            horizon_stats = {}
+            regime_stats = {}
+            # Stream rows straight off the cursor; sqlite3.Row gives access by column name
+            for row in cursor:
+                kind = row['kind']
+                if kind == 'horizon':
+                    horizon_stats[row['name']] = {
+                        'count': row['count'],
+                        'mape': round(row['avg_error'], 3),
+                        'min_error': round(row['min_error'], 3),
+                        'max_error': round(row['max_error'], 3),
+                        'accuracy': round(row['avg_accuracy'], 2)
+                    }
+                elif kind == 'regime':
+                    regime_stats[row['name']] = {
+                        'count': row['count'],
+                        'mape': round(row['avg_error'], 3)
+                    }
+                else:
+                    # Overall MAPE
+                    overall_mape = row['avg_error'] or 0
         
         return {
             'overall_mape': round(overall_mape, 3),
@@ -270,31 +430,33 @@ class AccuracyStorage:
         """Print accuracy summary"""
         summary = self.get_accuracy_summary(days)
         
-        print("\n" + "="*80)
-        print(f"V4.32 ACCURACY SUMMARY (Last {days} Days)")
-        print("="*80)
-        
-        print(f"\n📊 Overall Performance:")
-        print(f"   MAPE: {summary['overall_mape']:.3f}%")
-        print(f"   Accuracy: {summary['overall_accuracy']:.2f}%")
-        
-        print(f"\n🎯 Accuracy by Horizon:")
-        print(f"{'Horizon':<10} {'Samples':<10} {'MAPE':<12} {'Accuracy':<12} {'Range'}")
-        print("-"*80)
+        # Build the whole report and emit it with a single write
+        parts: list[str] = [
+            "\n" + "="*80,
+            f"V4.32 ACCURACY SUMMARY (Last {days} Days)",
+            "="*80,
+            f"\n📊 Overall Performance:",
+            f"   MAPE: {summary['overall_mape']:.3f}%",
+            f"   Accuracy: {summary['overall_accuracy']:.2f}%",
+            f"\n🎯 Accuracy by Horizon:",
+            f"{'Horizon':<10} {'Samples':<10} {'MAPE':<12} {'Accuracy':<12} {'Range'}",
+            "-"*80,
+        ]
         
         for horizon, stats in summary['horizon_stats'].items():
-            print(f"{horizon:<10} {stats['count']:<10} {stats['mape']:>10.3f}%  "
-                  f"{stats['accuracy']:>10.2f}%  {stats['min_error']:.3f}% - {stats['max_error']:.3f}%")
+            parts.append(f"{horizon:<10} {stats['count']:<10} {stats['mape']:>10.3f}%  "
+                         f"{stats['accuracy']:>10.2f}%  {stats['min_error']:.3f}% - {stats['max_error']:.3f}%")
         
         if summary['regime_stats']:
-            print(f"\n🎭 Accuracy by Regime:")
-            print(f"{'Regime':<20} {'Samples':<10} {'MAPE'}")
-            print("-"*50)
+            parts.append(f"\n🎭 Accuracy by Regime:")
+            parts.append(f"{'Regime':<20} {'Samples':<10} {'MAPE'}")
+            parts.append("-"*50)
             
             for regime, stats in summary['regime_stats'].items():
-                print(f"{regime:<20} {stats['count']:<10} {stats['mape']:>10.3f}%")
+                parts.append(f"{regime:<20} {stats['count']:<10} {stats['mape']:>10.3f}%")
         
-        print("="*80 + "\n")
+        parts.append("="*80 + "\n")
+        sys.stdout.write("\n".join(parts) + "\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,53 @@
+"""
+Aligned Forward Curve Polling
+
+Both curve APIs publish a new curve every 5 minutes. A single scheduler
+wakes all providers together at each 5-minute mark (plus each provider's
+poll_offset) and runs their fetches concurrently.
+"""
+
+import asyncio
+import time
+from typing import Callable, Optional, Sequence
+
+# Seconds between curve polls; polls land on multiples of this since the epoch
+POLL_PERIOD = 300
+
+
+def seconds_until_next_mark() -> tuple[int, float]:
+    """Return (minute of the next 5-minute mark, seconds until it)."""
+    now = time.time()
+    next_mark = (now // POLL_PERIOD + 1) * POLL_PERIOD
+    return int(next_mark % 3600 // 60), max(0.0, next_mark - now)
+
+
+async def aligned_five_min_scheduler(
+    providers: Sequence,
+    log_callback: Optional[Callable[[str, str], None]] = None,
+):
+    """
+    Fetch and broadcast from every provider now, then at each 5-minute mark.
+
+    Each provider needs a poll_offset (seconds after the mark) and an async
+    fetch_and_broadcast() method.
+    """
+    log = log_callback or (lambda level, msg: print(f"[{level}] {msg}"))
+
+    async def poll(provider, delay: float):
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await provider.fetch_and_broadcast()
+
+    delays = [0.0] * len(providers)  # First round runs immediately
+    while True:
+        results = await asyncio.gather(
+            *(poll(p, d) for p, d in zip(providers, delays)), return_exceptions=True
+        )
+        for provider, result in zip(providers, results):
+            if isinstance(result, Exception):
+                log("ERROR", f"{type(provider).__name__} poll error: {result}")
+
+        next_5min, seconds_to_wait = seconds_until_next_mark()
+        log("DEBUG", f"Next curve poll at :{next_5min:02d}, waiting {seconds_to_wait:.1f}s")
+        await asyncio.sleep(seconds_to_wait)
+        delays = [p.poll_offset for p in providers]
@@ -20,27 +20,66 @@ No complex infrastructure required - just HTTP/WebSocket.
 from __future__ import annotations
 
 import asyncio
-import json
 import os
 import socket
+import time
+import zlib
 from datetime import UTC, datetime
+from pathlib import Path
 from typing import Any, LiteralString
 
 import ssl
 
 import aiohttp
+import certifi
+import orjson
 import websockets
 from aiohttp import web
 from dotenv import load_dotenv
-
-# Create SSL context that doesn't verify certificates (for Mac Python SSL issues)
-SSL_CONTEXT = ssl.create_default_context()
-SSL_CONTEXT.check_hostname = False
-SSL_CONTEXT.verify_mode = ssl.CERT_NONE
+from yarl import URL
+
+try:
+    import uvloop
+except ImportError:  # Optional: falls back to the default asyncio event loop
+    uvloop = None
+
+# Verifying SSL context backed by certifi's CA bundle (Mac Python ships without system CAs)
+SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+
+# Timeout for proxied upstream HTTP requests
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+# Cadence (seconds) at which buffered Binance trades are flushed to the UI
+TICK_FLUSH_INTERVAL = 0.1
+# Binance messages relayed between forced yields to the event loop, as a bit mask (64 - 1)
+BINANCE_YIELD_EVERY_MASK = 63
+
+# Freshness window (seconds) for cached Binance proxy responses
+KLINES_CACHE_TTL = 10.0
+AGGTRADES_CACHE_TTL = 2.0
+# Entries kept per proxy cache before the oldest is evicted
+PROXY_CACHE_MAX_ENTRIES = 1000
+
+# Per-client outbound queue size; the oldest message is dropped when a slow client falls behind
+WS_SEND_QUEUE_SIZE = 1024
+# Maximum number of queued messages merged into one batch frame
+WS_BATCH_MAX_MESSAGES = 64
+# Broadcast payloads larger than this are zlib-compressed once and shared by all clients
+WS_COMPRESS_MIN_BYTES = 512
+# Seconds between protocol-level pings to each UI client; unanswered pings close the socket
+WS_PING_INTERVAL = 25.0
+# Largest message accepted from the UI (it only sends small control messages)
+WS_MAX_INBOUND_SIZE = 64 * 1024
+# Type prefix of a binary frame carrying a zlib-compressed JSON payload
+WS_FRAME_ZLIB = b"\x01"
+
+# Let browsers reuse the UI page briefly; FileResponse adds ETag/Last-Modified for revalidation
+INDEX_HEADERS = {"Cache-Control": "public, max-age=60"}
 
 # Import Forward Curve Providers
 from v5_curve_provider import V5CurveProvider
 from v4_curve_provider import V4CurveProvider
+from curve_scheduler import aligned_five_min_scheduler
 from accuracy_storage import AccuracyStorage
 
 # Load environment variables
@@ -63,30 +102,65 @@ class ForwardCurveServer:
     ):
         self.port = port
         self.log_level = log_level
+        self._debug_enabled = log_level.upper() == "DEBUG"
+        # (epoch second, formatted timestamp) of the last log line
+        self._log_ts: tuple[int, str] = (0, "")
         self.test_mode = test_mode
         self.app = web.Application()
 
+        # UI assets served by handle_index and the /js/ static route
+        self._ui_dir = Path(__file__).resolve().parent.parent / "ui"
+        self._index_path = self._ui_dir / "chart.html"
+
         # WebSocket clients (UI connections)
         self.ws_clients: set[web.WebSocketResponse] = set()
+        # Outbound message queue per client, drained by that client's writer task
+        self._client_queues: dict[web.WebSocketResponse, asyncio.Queue[bytes]] = {}
+        # Snapshot of the queues for broadcast fan-out, rebuilt only after clients change
+        self._client_queue_list: list[asyncio.Queue[bytes]] = []
+        self._clients_dirty = False
 
-        # In-memory state
-        self.latest_tick: dict[str, Any] | None = None
+        # In-memory state: raw JSON of the last Binance trade (decoded on demand)
+        self._latest_tick_raw: bytes | None = None
 
         # Binance WebSocket
         self.binance_ws_task: asyncio.Task | None = None
+        # Trades received since the last flush, relayed every TICK_FLUSH_INTERVAL
+        self._pending_ticks: list[bytes] = []
+        self.tick_flush_task: asyncio.Task | None = None
+
+        # Pooled HTTP client for the upstream proxies (created in start())
+        self._http_session: aiohttp.ClientSession | None = None
+
+        # Binance proxy response caches: sorted query items -> (monotonic time, body)
+        self._klines_cache: dict[tuple, tuple[float, bytes]] = {}
+        self._aggtrades_cache: dict[tuple, tuple[float, bytes]] = {}
+        # In-flight upstream fetches keyed by (endpoint, sorted query items)
+        self._inflight: dict[tuple, asyncio.Task[tuple[int, bytes]]] = {}
 
         # V5 Forward Curve Provider
         self.curve_provider: V5CurveProvider | None = None
+        # Shared 5-minute polling task for all enabled curve providers
         self.curve_poll_task: asyncio.Task | None = None
+        # (price, direction, confidence) of the last logged V5 curve
+        self._last_curve_state: tuple | None = None
+        # Encoded JSON of the last V5 curve broadcast, sent to newly connected clients
+        self._last_v5_bytes: bytes | None = None
 
         # V4 Forward Curve Provider
         self.v4_curve_provider: V4CurveProvider | None = None
+        # (price, regime, quality) of the last logged V4 curve
+        self._last_v4_curve_state: tuple | None = None
+        # Encoded JSON of the last V4 curve broadcast, sent to newly connected clients
+        self._last_v4_bytes: bytes | None = None
 
         # Accuracy Storage
         self.accuracy_storage: AccuracyStorage | None = None
 
         self.heartbeat_task: asyncio.Task | None = None
         self.runtime_id: str = ""  # Will be set in start()
+        self._heartbeat_prefix: bytes = b""  # Will be set in start()
+        self._heartbeat_suffix: bytes = b""
 
     # ============================================
     # LOGGING
@@ -94,7 +168,14 @@ class ForwardCurveServer:
 
     def log(self, level: str, message: str | LiteralString, **kwargs: Any) -> None:
         """Simple logging."""
-        timestamp = datetime.now(UTC).strftime("%Y-%m-%d %H:%M:%S")
+        if level == "DEBUG" and not self._debug_enabled:
+            return
+
+        # Lines logged within the same second share one formatted timestamp
+        sec = int(time.time())
+        if sec != self._log_ts[0]:
+            self._log_ts = (sec, time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(sec)))
+        timestamp = self._log_ts[1]
         extra = f" {kwargs}" if kwargs else ""
         print(f"[{timestamp}] [{level}] {message}{extra}")
 
@@ -112,76 +193,135 @@ class ForwardCurveServer:
 
                 async with websockets.connect(uri, ping_interval=30, ssl=SSL_CONTEXT) as ws:
                     self.log("INFO", "Connected to Binance WebSocket")
+                    tick_count = 0
 
                     async for message in ws:
-                        try:
-                            tick_data = json.loads(message)
-                            self.latest_tick = tick_data
+                        # Relay the trade JSON as-is; the UI is the only consumer of its fields
+                        raw = message if isinstance(message, bytes) else message.encode()
+                        # Cheap sanity check instead of a full parse, so one bad message
+                        # can't corrupt a merged batch frame
+                        if raw[:1] != b"{" or raw[-1:] != b"}":
+                            self.log("ERROR", f"Unexpected Binance message: {raw[:100]!r}")
+                            continue
+
+                        self._latest_tick_raw = raw
 
-                            # Broadcast to UI
-                            await self.broadcast({"type": "trade", "data": tick_data})
+                        # Broadcast to UI on the next flush (see _tick_flush_loop)
+                        self._pending_ticks.append(raw)
 
-                        except json.JSONDecodeError as e:
-                            self.log("ERROR", f"Failed to parse Binance message: {e}")
+                        # A burst can keep the socket readable for a long time; hand
+                        # the loop to heartbeats, polling and UI clients regularly
+                        tick_count += 1
+                        if tick_count & BINANCE_YIELD_EVERY_MASK == 0:
+                            await asyncio.sleep(0)
 
             except Exception as e:
                 self.log("ERROR", f"Binance WebSocket error: {e}")
                 self.log("INFO", "Reconnecting in 5 seconds...")
                 await asyncio.sleep(5)
 
+    async def _tick_flush_loop(self) -> None:
+        """Relay buffered trades to the UI every TICK_FLUSH_INTERVAL seconds."""
+        while True:
+            try:
+                await asyncio.sleep(TICK_FLUSH_INTERVAL)
+                if not self._pending_ticks:
+                    continue
+
+                ticks, self._pending_ticks = self._pending_ticks, []
+                if not self.ws_clients:
+                    continue
+
+                # Relayed unparsed and queued back to back, so each client's writer
+                # merges the whole flush into one batch frame
+                for raw in ticks:
+                    await self.broadcast_bytes(b'{"type":"trade","data":' + raw + b"}")
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.log("ERROR", f"Error in tick flush loop: {e}")
+
+    @property
+    def latest_tick(self) -> dict[str, Any] | None:
+        """Last Binance trade message, decoded on access."""
+        if self._latest_tick_raw is None:
+            return None
+        return orjson.loads(self._latest_tick_raw)
+
     # ============================================
     # 2. BINANCE HISTORY PROXY
     # ============================================
 
     async def handle_binance_klines(self, request: web.Request) -> web.Response:
         """Proxy Binance klines API."""
-        try:
-            params = dict(request.query)
-
-            connector = aiohttp.TCPConnector(ssl=SSL_CONTEXT)
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.get(
-                    "https://api.binance.com/api/v3/klines",
-                    params=params,
-                    timeout=aiohttp.ClientTimeout(total=10),
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        return web.json_response(data)
-                    else:
-                        error_text = await resp.text()
-                        self.log("ERROR", f"Binance API error: {resp.status} - {error_text}")
-                        return web.json_response(
-                            {"error": f"Binance API error: {resp.status}"}, status=resp.status
-                        )
-
-        except Exception as e:
-            self.log("ERROR", f"Error proxying Binance klines: {e}")
-            return web.json_response({"error": str(e)}, status=500)
+        return await self._proxy_binance(request, "klines", self._klines_cache, KLINES_CACHE_TTL)
 
     async def handle_binance_aggtrades(self, request: web.Request) -> web.Response:
         """Proxy Binance aggTrades API."""
+        return await self._proxy_binance(request, "aggTrades", self._aggtrades_cache, AGGTRADES_CACHE_TTL)
+
+    async def _proxy_binance(
+        self,
+        request: web.Request,
+        endpoint: str,
+        cache: dict[tuple, tuple[float, bytes]],
+        ttl: float,
+    ) -> web.Response:
+        """Proxy a Binance REST endpoint, serving repeat queries from a short-lived cache."""
+        key = tuple(sorted(request.query.items()))
+        cached = cache.get(key)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return web.Response(body=cached[1], content_type="application/json")
+
+        # Single-flight: concurrent identical requests share one upstream fetch
+        flight_key = (endpoint, key)
+        flight = self._inflight.get(flight_key)
+        if flight is None:
+            flight = asyncio.create_task(
+                self._fetch_binance(endpoint, request.rel_url.raw_query_string, cache, key)
+            )
+            self._inflight[flight_key] = flight
+            flight.add_done_callback(lambda _: self._inflight.pop(flight_key, None))
+
+        # Shielded so one client disconnecting doesn't cancel the fetch for the others
+        status, body = await asyncio.shield(flight)
+        return web.Response(body=body, status=status, content_type="application/json")
+
+    async def _fetch_binance(
+        self,
+        endpoint: str,
+        query_string: str,
+        cache: dict[tuple, tuple[float, bytes]],
+        key: tuple,
+    ) -> tuple[int, bytes]:
+        """Fetch a Binance REST endpoint; returns (status, JSON body) and caches successes."""
         try:
-            params = dict(request.query)
-
-            connector = aiohttp.TCPConnector(ssl=SSL_CONTEXT)
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.get(
-                    "https://api.binance.com/api/v3/aggTrades",
-                    params=params,
-                    timeout=aiohttp.ClientTimeout(total=10),
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        return web.json_response(data)
-                    else:
-                        return web.json_response(
-                            {"error": f"Binance API error: {resp.status}"}, status=resp.status
-                        )
+            # Forward the client's query string as received; encoded=True skips re-quoting
+            url = URL(f"https://api.binance.com/api/v3/{endpoint}?{query_string}", encoded=True)
+            async with self._http_session.get(url, timeout=HTTP_TIMEOUT) as resp:
+                if resp.status == 200:
+                    # Pass the upstream JSON through untouched: no parse, no re-encode
+                    body = await resp.read()
+                    self._cache_store(cache, key, body)
+                    return 200, body
+                else:
+                    error_text = await resp.text()
+                    self.log("ERROR", f"Binance API error: {resp.status} - {error_text}")
+                    return resp.status, orjson.dumps({"error": f"Binance API error: {resp.status}"})
 
         except Exception as e:
-            self.log("ERROR", f"Error proxying Binance aggTrades: {e}")
-            return web.json_response({"error": str(e)}, status=500)
+            self.log("ERROR", f"Error proxying Binance {endpoint}: {e}")
+            return 500, orjson.dumps({"error": str(e)})
+
+    @staticmethod
+    def _cache_store(cache: dict[tuple, tuple[float, bytes]], key: tuple, body: bytes) -> None:
+        """Insert a response body into a proxy cache, evicting the oldest entry when full."""
+        # Re-inserting keeps the dict ordered oldest-first
+        cache.pop(key, None)
+        cache[key] = (time.monotonic(), body)
+        if len(cache) > PROXY_CACHE_MAX_ENTRIES:
+            del cache[next(iter(cache))]
 
     # ============================================
     # 3. V5 FORWARD CURVE PROVIDER
@@ -190,7 +330,12 @@ class ForwardCurveServer:
     async def broadcast_curve(self, curve_data: dict):
         """Broadcast forward curve data to all connected clients."""
         num_clients = len(self.ws_clients)
-        await self.broadcast(curve_data)
+        try:
+            # Keep the encoded curve for clients that connect before the next update
+            self._last_v5_bytes = orjson.dumps(curve_data)
+            await self.broadcast_bytes(self._last_v5_bytes)
+        except Exception as e:
+            self.log("ERROR", f"Error broadcasting: {e}")
 
         # Only log when something changes
         price = curve_data.get("current_price", 0)
@@ -201,8 +346,8 @@ class ForwardCurveServer:
         if num_clients > 0:
             self.log("DEBUG", f"Broadcast curve to {num_clients} client(s)")
 
-        current_state = f"{price:.2f}|{direction}|{confidence}"
-        if not hasattr(self, '_last_curve_state') or self._last_curve_state != current_state:
+        current_state = (round(price, 2), direction, confidence)
+        if self._last_curve_state != current_state:
             self._last_curve_state = current_state
             self.log("INFO", f"Forward curve updated: ${price:,.2f} {direction} ({confidence})")
 
@@ -213,7 +358,12 @@ class ForwardCurveServer:
     async def broadcast_v4_curve(self, curve_data: dict):
         """Broadcast V4 forward curve data to all connected clients."""
         num_clients = len(self.ws_clients)
-        await self.broadcast(curve_data)
+        try:
+            # Keep the encoded curve for clients that connect before the next update
+            self._last_v4_bytes = orjson.dumps(curve_data)
+            await self.broadcast_bytes(self._last_v4_bytes)
+        except Exception as e:
+            self.log("ERROR", f"[V4] Error broadcasting: {e}")
 
         # Store accuracy data
         if self.accuracy_storage:
@@ -229,8 +379,8 @@ class ForwardCurveServer:
         if num_clients > 0:
             self.log("DEBUG", f"[V4] Broadcast curve to {num_clients} client(s)")
 
-        current_state = f"{price:.2f}|{regime}|{quality:.2f}"
-        if not hasattr(self, '_last_v4_curve_state') or self._last_v4_curve_state != current_state:
+        current_state = (round(price, 2), regime, round(quality, 2))
+        if self._last_v4_curve_state != current_state:
             self._last_v4_curve_state = current_state
             self.log("INFO", f"[V4] Forward curve updated: ${price:,.2f} {regime} (quality: {quality:.2f})")
 
@@ -247,16 +397,15 @@ class ForwardCurveServer:
         """Get historical curves from V5 API."""
         limit = int(request.query.get("limit", "10"))
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{V5CurveProvider.V5_BASE_URL}/history?limit={limit}",
-                    timeout=aiohttp.ClientTimeout(total=10),
-                    headers={"ngrok-skip-browser-warning": "true"}
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        return web.json_response(data)
-                    return web.json_response({"error": f"V5 API error: {resp.status}"}, status=resp.status)
+            async with self._http_session.get(
+                f"{V5CurveProvider.V5_BASE_URL}/history?limit={limit}",
+                timeout=HTTP_TIMEOUT,
+                headers={"ngrok-skip-browser-warning": "true"}
+            ) as resp:
+                if resp.status == 200:
+                    # Pass the upstream JSON through untouched: no parse, no re-encode
+                    return web.Response(body=await resp.read(), content_type="application/json")
+                return web.json_response({"error": f"V5 API error: {resp.status}"}, status=resp.status)
         except Exception as e:
             self.log("ERROR", f"Error fetching curve history: {e}")
             return web.json_response({"error": str(e)}, status=500)
@@ -292,35 +441,87 @@ class ForwardCurveServer:
             return
 
         try:
-            message_str = json.dumps(message)
+            # Serialize once; every client receives the same bytes
+            await self.broadcast_bytes(orjson.dumps(message))
+        except Exception as e:
+            self.log("ERROR", f"Error broadcasting: {e}")
+
+    async def broadcast_bytes(self, payload: bytes):
+        """Broadcast a pre-serialized JSON payload to all connected UI clients."""
+        if not self.ws_clients:
+            return
 
-            # Send to all clients
-            disconnected = set()
-            for ws in self.ws_clients:
-                try:
-                    await ws.send_str(message_str)
-                except Exception:
-                    disconnected.add(ws)
+        # Compress large payloads once here rather than per connection
+        if len(payload) > WS_COMPRESS_MIN_BYTES:
+            payload = WS_FRAME_ZLIB + zlib.compress(payload, 1)
 
-            # Clean up disconnected clients
-            self.ws_clients -= disconnected
+        if self._clients_dirty:
+            self._client_queue_list = list(self._client_queues.values())
+            self._clients_dirty = False
 
+        # Hand the payload to each client's writer; never wait on a slow socket here
+        for queue in self._client_queue_list:
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                queue.get_nowait()  # Drop the oldest message
+                queue.put_nowait(payload)
+
+    async def _client_writer(self, ws: web.WebSocketResponse, queue: asyncio.Queue[bytes]) -> None:
+        """Drain a client's queue, merging bursts of messages into one batch frame."""
+        try:
+            while True:
+                payloads = [await queue.get()]
+                while len(payloads) < WS_BATCH_MAX_MESSAGES and not queue.empty():
+                    payloads.append(queue.get_nowait())
+
+                # Compressed payloads go out as binary frames as-is; runs of plain
+                # JSON payloads in between are merged into text frames
+                pending: list[bytes] = []
+                for payload in payloads:
+                    if payload[:1] == WS_FRAME_ZLIB:
+                        await self._send_text_batch(ws, pending)
+                        pending = []
+                        await ws.send_frame(payload, web.WSMsgType.BINARY)
+                    else:
+                        pending.append(payload)
+                await self._send_text_batch(ws, pending)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            self.log("ERROR", f"Error broadcasting: {e}")
+            self.log("DEBUG", f"WebSocket send failed, dropping client: {e}")
+            self._drop_client(ws)
+
+    def _drop_client(self, ws: web.WebSocketResponse) -> None:
+        """Stop broadcasting to a client; safe to call more than once."""
+        if self._client_queues.pop(ws, None) is not None:
+            self._clients_dirty = True
+        self.ws_clients.discard(ws)
+
+    @staticmethod
+    async def _send_text_batch(ws: web.WebSocketResponse, payloads: list[bytes]) -> None:
+        """Send JSON payloads as one text frame, wrapping several in a batch message."""
+        if not payloads:
+            return
+        if len(payloads) == 1:
+            frame = payloads[0]
+        else:
+            # Payloads are already JSON; splice them without re-encoding
+            frame = b'{"type":"batch","items":[' + b",".join(payloads) + b"]}"
+        # Text frames: the UI JSON.parses msg.data
+        await ws.send_frame(frame, web.WSMsgType.TEXT)
 
     async def _heartbeat_loop(self) -> None:
         """Broadcast heartbeats every 5 seconds."""
         while True:
             try:
-                heartbeat_message = {
-                    "type": "heartbeat",
-                    "data": {
-                        "instance_name": "ForwardCurveHub",
-                        "instance_id": self.runtime_id,
-                        "heartbeat_at": datetime.now(UTC).isoformat(),
-                    },
-                }
-                await self.broadcast(heartbeat_message)
+                # Only the timestamp changes; splice it into the prebuilt template
+                payload = (
+                    self._heartbeat_prefix
+                    + datetime.now(UTC).isoformat().encode()
+                    + self._heartbeat_suffix
+                )
+                await self.broadcast_bytes(payload)
                 await asyncio.sleep(5)  # Heartbeat every 5 seconds
 
             except Exception as e:
@@ -329,32 +530,33 @@ class ForwardCurveServer:
 
     async def handle_websocket(self, request: web.Request) -> web.WebSocketResponse:
         """Handle WebSocket connections from UI."""
-        ws = web.WebSocketResponse()
+        # No permessage-deflate: large broadcasts are compressed once in broadcast_bytes().
+        # aiohttp's ping/pong handles per-connection liveness; the JSON heartbeat is for the UI.
+        ws = web.WebSocketResponse(
+            heartbeat=WS_PING_INTERVAL,
+            autoping=True,
+            compress=False,
+            max_msg_size=WS_MAX_INBOUND_SIZE,
+        )
         await ws.prepare(request)
 
-        self.ws_clients.add(ws)
         client_ip = request.remote or "unknown"
-        self.log("INFO", f"WebSocket connected: {client_ip} (total: {len(self.ws_clients)})")
 
-        # Send current V5 curve data immediately to new client
-        if self.curve_provider:
-            last_curve = self.curve_provider.get_last_curve()
-            if last_curve:
-                try:
-                    await ws.send_str(json.dumps(last_curve))
-                    self.log("INFO", f"Sent initial V5 curve to {client_ip}")
-                except Exception as e:
-                    self.log("ERROR", f"Failed to send initial V5 curve: {e}")
-
-        # Send current V4 curve data immediately to new client
-        if self.v4_curve_provider:
-            last_v4_curve = self.v4_curve_provider.get_last_curve()
-            if last_v4_curve:
-                try:
-                    await ws.send_str(json.dumps(last_v4_curve))
-                    self.log("INFO", f"Sent initial V4 curve to {client_ip}")
-                except Exception as e:
-                    self.log("ERROR", f"Failed to send initial V4 curve: {e}")
+        # Queue the current V5 and V4 curves ahead of any broadcast, then register
+        # without awaiting in between so no broadcast can slip past this client.
+        # The writer task is the sole sender on this socket.
+        queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        if self._last_v5_bytes is not None:
+            queue.put_nowait(self._last_v5_bytes)
+            self.log("INFO", f"Queued initial V5 curve for {client_ip}")
+        if self._last_v4_bytes is not None:
+            queue.put_nowait(self._last_v4_bytes)
+            self.log("INFO", f"Queued initial V4 curve for {client_ip}")
+        self._client_queues[ws] = queue
+        self._clients_dirty = True
+        self.ws_clients.add(ws)
+        writer_task = asyncio.create_task(self._client_writer(ws, queue))
+        self.log("INFO", f"WebSocket connected: {client_ip} (total: {len(self.ws_clients)})")
 
         try:
             async for msg in ws:
@@ -364,7 +566,8 @@ class ForwardCurveServer:
                 elif msg.type == web.WSMsgType.ERROR:
                     self.log("ERROR", f"WebSocket error: {ws.exception()}")
         finally:
-            self.ws_clients.discard(ws)
+            writer_task.cancel()
+            self._drop_client(ws)
             self.log("INFO", f"WebSocket disconnected: {client_ip} (remaining: {len(self.ws_clients)})")
 
         return ws
@@ -397,9 +600,7 @@ class ForwardCurveServer:
 
     async def handle_index(self, request: web.Request) -> web.FileResponse:
         """Serve main UI page."""
-        import pathlib
-        ui_dir = pathlib.Path(__file__).parent.parent / "ui"
-        return web.FileResponse(ui_dir / "chart.html")
+        return web.FileResponse(self._index_path, headers=INDEX_HEADERS)
 
     async def handle_telemetry_stub(self, request: web.Request) -> web.Response:
         """Stub handler for telemetry endpoints (traces, logs). Just accepts and ignores."""
@@ -435,9 +636,7 @@ class ForwardCurveServer:
         self.app.router.add_post("/api/logs", self.handle_telemetry_stub)
 
         # Static files (UI)
-        import pathlib
-        ui_dir = pathlib.Path(__file__).parent.parent / "ui"
-        self.app.router.add_static("/js/", str(ui_dir / "js"))
+        self.app.router.add_static("/js/", self._ui_dir / "js")
         self.app.router.add_get("/", self.handle_index)
         self.app.router.add_get("/chart.html", self.handle_index)
 
@@ -453,6 +652,25 @@ class ForwardCurveServer:
         self.runtime_id = f"{hostname}-{pid}-{int(datetime.now(UTC).timestamp())}"
         self.log("INFO", f"Runtime ID: {self.runtime_id}")
 
+        # Heartbeat JSON around the heartbeat_at timestamp (see _heartbeat_loop)
+        self._heartbeat_prefix = (
+            b'{"type":"heartbeat","data":{"instance_name":"ForwardCurveHub","instance_id":'
+            + orjson.dumps(self.runtime_id)
+            + b',"heartbeat_at":"'
+        )
+        self._heartbeat_suffix = b'"}}'
+
+        # Shared upstream HTTP session (Binance proxies, curve history and the curve
+        # providers): pooled keep-alive connections and TLS session reuse
+        self._http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                ssl=SSL_CONTEXT,
+                limit=64,
+                ttl_dns_cache=300,
+                keepalive_timeout=75,
+            )
+        )
+
         # Initialize V5 Forward Curve Provider - DISABLED (100% bullish issue)
         self.log("INFO", "V5 Forward Curve Provider DISABLED")
         self.curve_provider = None
@@ -460,6 +678,7 @@ class ForwardCurveServer:
         #     self.curve_provider = V5CurveProvider(
         #         log_callback=lambda level, msg: self.log(level, f"[V5] {msg}"),
         #         poll_interval=300.0,  # Poll every 5 minutes (model updates every 5 mins)
+        #         session=self._http_session,
         #     )
         #     self.log("INFO", "✓ V5 Forward Curve Provider initialized")
         # except Exception as e:
@@ -481,6 +700,7 @@ class ForwardCurveServer:
             self.v4_curve_provider = V4CurveProvider(
                 log_callback=lambda level, msg: self.log(level, msg),
                 poll_interval=300.0,  # Poll every 5 minutes
+                session=self._http_session,
             )
             self.log("INFO", "✓ V4.32 Forward Curve Provider initialized")
         except Exception as e:
@@ -493,16 +713,27 @@ class ForwardCurveServer:
         # Start background tasks
         self.log("INFO", "Starting Binance tick stream...")
         self.binance_ws_task = asyncio.create_task(self.start_binance_tick_stream())
+        self.tick_flush_task = asyncio.create_task(self._tick_flush_loop())
+
+        # Start curve polling: one aligned scheduler drives every enabled provider
+        curve_providers = []
 
-        # Start V5 curve polling - DISABLED
+        # V5 curve polling - DISABLED
         # if self.curve_provider:
         #     self.log("INFO", "Starting V5 forward curve polling...")
-        #     await self.curve_provider.start_polling(self.broadcast_curve)
+        #     self.curve_provider.set_broadcast_callback(self.broadcast_curve)
+        #     curve_providers.append(self.curve_provider)
 
-        # Start V4 curve polling
+        # V4 curve polling
         if self.v4_curve_provider:
             self.log("INFO", "Starting V4.32 forward curve polling...")
-            await self.v4_curve_provider.start_polling(self.broadcast_v4_curve)
+            self.v4_curve_provider.set_broadcast_callback(self.broadcast_v4_curve)
+            curve_providers.append(self.v4_curve_provider)
+
+        if curve_providers:
+            self.curve_poll_task = asyncio.create_task(
+                aligned_five_min_scheduler(curve_providers, log_callback=self.log)
+            )
 
         # Start heartbeat
         self.log("INFO", "Starting heartbeat (every 5s)...")
@@ -533,6 +764,14 @@ class ForwardCurveServer:
         """Stop the server."""
         if self.binance_ws_task:
             self.binance_ws_task.cancel()
+        if self.tick_flush_task:
+            self.tick_flush_task.cancel()
+        if self.curve_poll_task:
+            self.curve_poll_task.cancel()
+            try:
+                await self.curve_poll_task
+            except asyncio.CancelledError:
+                pass
         if self.curve_provider:
             await self.curve_provider.stop_polling()
         if self.v4_curve_provider:
@@ -543,6 +782,10 @@ class ForwardCurveServer:
                 await self.heartbeat_task
             except asyncio.CancelledError:
                 pass
+        if self._http_session:
+            await self._http_session.close()
+        if self.accuracy_storage:
+            self.accuracy_storage.close()
 
 
 # ============================================
@@ -571,8 +814,23 @@ def main():
         test_mode=args.test,
     )
 
+    async def _amain():
+        # Eager tasks (Python 3.12+) run synchronously until their first real
+        # suspension, so short-lived tasks skip a trip through the scheduler
+        eager_task_factory = getattr(asyncio, "eager_task_factory", None)
+        if eager_task_factory is not None:
+            asyncio.get_running_loop().set_task_factory(eager_task_factory)
+        try:
+            await server.start()
+        finally:
+            # Also runs when Ctrl+C cancels this task: close sessions and the database
+            await server.stop()
+
+    # libuv-based event loop when available; much cheaper socket I/O for the WS fan-out
+    run = uvloop.run if uvloop is not None else asyncio.run
+
     try:
-        asyncio.run(server.start())
+        run(_amain())
     except KeyboardInterrupt:
         print("\nShutting down...")
 
@@ -17,6 +17,7 @@ Usage:
 
 import asyncio
 import json
+import zlib
 
 import websockets
 
@@ -37,44 +38,51 @@ async def test_websocket():
 
             async for message in websocket:
                 try:
+                    # Large messages arrive as binary frames: 0x01 then zlib-compressed JSON
+                    if isinstance(message, bytes) and message[:1] == b"\x01":
+                        message = zlib.decompress(message[1:])
                     data = json.loads(message)
-                    msg_type = data.get("type", "unknown")
-
-                    if msg_type == "trade":
-                        tick_data = data.get("data", {})
-                        price = tick_data.get("p", "N/A")
-                        print(f"[TICK] Price: ${price}")
-
-                    elif msg_type == "prediction":
-                        pred_data = data.get("data", {}).get("data", {})
-                        predicted = pred_data.get("predictedMarketPrice", "N/A")
-                        hours = pred_data.get("hours", "N/A")
-                        print(f"[PREDICTION] {hours}h → ${predicted}")
-
-                    elif msg_type == "strategy_event":
-                        event = data.get("data", {})
-                        position = event.get("position", "?")
-                        reason = event.get("reason", "?")
-                        event_data = event.get("event_data", {})
-
-                        if position == "OPEN":
-                            direction = event_data.get("signal_direction", "?")
-                            entry = event_data.get("entry_price", 0)
-                            sl = event_data.get("stop_loss_price", 0)
-                            print(f"[SIGNAL] 🚀 {direction} @ ${entry:.2f}, SL: ${sl:.2f}")
-
-                        elif position == "CLOSE":
-                            pnl = event_data.get("pnl", 0)
-                            pnl_pct = event_data.get("pnl_percentage", 0)
-                            print(f"[CLOSE] 🛑 {reason}, PNL: ${pnl:.2f} ({pnl_pct:.2f}%)")
-
-                        elif position == "UPDATE":
-                            if "TRAILING" in reason:
-                                new_sl = event_data.get("stop_loss_price", 0)
-                                print(f"[UPDATE] 🎯 {reason}, New SL: ${new_sl:.2f}")
-
-                    else:
-                        print(f"[{msg_type.upper()}] {json.dumps(data, indent=2)[:200]}...")
+                    # The server merges bursts of messages into a single batch frame
+                    items = data.get("items", []) if data.get("type") == "batch" else [data]
+
+                    for data in items:
+                        msg_type = data.get("type", "unknown")
+
+                        if msg_type == "trade":
+                            tick_data = data.get("data", {})
+                            price = tick_data.get("p", "N/A")
+                            print(f"[TICK] Price: ${price}")
+
+                        elif msg_type == "prediction":
+                            pred_data = data.get("data", {}).get("data", {})
+                            predicted = pred_data.get("predictedMarketPrice", "N/A")
+                            hours = pred_data.get("hours", "N/A")
+                            print(f"[PREDICTION] {hours}h → ${predicted}")
+
+                        elif msg_type == "strategy_event":
+                            event = data.get("data", {})
+                            position = event.get("position", "?")
+                            reason = event.get("reason", "?")
+                            event_data = event.get("event_data", {})
+
+                            if position == "OPEN":
+                                direction = event_data.get("signal_direction", "?")
+                                entry = event_data.get("entry_price", 0)
+                                sl = event_data.get("stop_loss_price", 0)
+                                print(f"[SIGNAL] 🚀 {direction} @ ${entry:.2f}, SL: ${sl:.2f}")
+
+                            elif position == "CLOSE":
+                                pnl = event_data.get("pnl", 0)
+                                pnl_pct = event_data.get("pnl_percentage", 0)
+                                print(f"[CLOSE] 🛑 {reason}, PNL: ${pnl:.2f} ({pnl_pct:.2f}%)")
+
+                            elif position == "UPDATE":
+                                if "TRAILING" in reason:
+                                    new_sl = event_data.get("stop_loss_price", 0)
+                                    print(f"[UPDATE] 🎯 {reason}, New SL: ${new_sl:.2f}")
+
+                        else:
+                            print(f"[{msg_type.upper()}] {json.dumps(data, indent=2)[:200]}...")
 
                 except json.JSONDecodeError:
                     print(f"[ERROR] Invalid JSON: {message[:100]}")
@@ -7,10 +7,32 @@ Provides curve data with 8 horizons: 1H, 2H, 4H, 6H, 8H, 12H, 18H, 24H.
 
 import aiohttp
 import asyncio
+import orjson
 import ssl
+from collections import deque
+from types import MappingProxyType
 from datetime import datetime, UTC
 from typing import Any, Optional, Callable
 
+from curve_scheduler import aligned_five_min_scheduler
+
+# SSL context that doesn't verify certificates (for ngrok)
+SSL_CONTEXT = ssl.create_default_context()
+SSL_CONTEXT.check_hostname = False
+SSL_CONTEXT.verify_mode = ssl.CERT_NONE
+
+# Headers sent with every V4 API request
+REQUEST_HEADERS = {"ngrok-skip-browser-warning": "true"}
+
+# Deadline (seconds) for the required tracking request, including its body
+FETCH_TIMEOUT = 15
+# Deadline (seconds) for each optional request (yesterday, history); on expiry
+# the curve is built without that data
+OPTIONAL_FETCH_TIMEOUT = 10
+
+# Shared read-only stand-in for a missing per-horizon entry
+_EMPTY = MappingProxyType({})
+
 
 class V4CurveProvider:
     """Provider for V4.32 forward curve data."""
@@ -21,82 +43,199 @@ class V4CurveProvider:
     # Horizons in order (V4 has 8 horizons up to 24H) - with + prefix as returned by API
     HORIZONS = ["+1H", "+2H", "+4H", "+6H", "+8H", "+12H", "+18H", "+24H"]
 
+    # Seconds after each 5-minute mark to poll (+5s, after V5's +2s)
+    poll_offset = 5.0
+
     def __init__(
         self,
         log_callback: Optional[Callable[[str, str], None]] = None,
         poll_interval: float = 300.0,  # 5 minutes
+        session: Optional[aiohttp.ClientSession] = None,
     ):
         self.log_callback = log_callback or (lambda level, msg: print(f"[{level}] {msg}"))
         self.poll_interval = poll_interval
         self._polling_task: Optional[asyncio.Task] = None
         self._broadcast_callback: Optional[Callable] = None
         self._last_curve: Optional[dict] = None
+        # HTTP session: injected and owned by the caller, or created lazily and
+        # closed in stop_polling
+        self._session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
 
         # Store curve history to track prediction evolution over time
-        # Key: anchor_timestamp, Value: list of curve snapshots
-        self._curve_history: list[dict] = []
         self._max_history_size = 300  # ~25 hours at 5min intervals
+        # History indexed by horizon: (snapshot seq, price) for each of the last
+        # _max_history_size snapshots in which the horizon was still a prediction
+        self._history_by_horizon: dict[str, deque[tuple]] = {h: deque() for h in self.HORIZONS}
+        self._snapshot_seq = 0
+
+        # Validators and decoded body of the last 200 per endpoint path:
+        # path -> (ETag, Last-Modified, body), used for conditional GETs
+        self._conditional_cache: dict[str, tuple[Optional[str], Optional[str], Any]] = {}
+
+        # Last transformed curve and the (tracking, yesterday, history) bodies it was built from
+        self._last_transform: Optional[tuple[tuple, dict]] = None
 
     def log(self, level: str, message: str):
         self.log_callback(level, message)
 
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the HTTP session, creating an owned one on first use."""
+        if self._owns_session and (self._session is None or self._session.closed):
+            # Keep-alive connections are reused across polls instead of reconnecting each time
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(ssl=SSL_CONTEXT, limit=10, keepalive_timeout=75),
+            )
+        return self._session
+
     async def fetch_curve(self) -> Optional[dict]:
         """Fetch current forward curve from V4 API /prediction/tracking."""
         try:
-            # Create SSL context that doesn't verify certificates (for ngrok)
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
-            async with aiohttp.ClientSession(connector=connector) as session:
-                # Fetch tracking, yesterday, and history endpoints in parallel
-                tracking_task = session.get(
-                    f"{self.V4_BASE_URL}/prediction/tracking",
-                    timeout=aiohttp.ClientTimeout(total=15),
-                    headers={"ngrok-skip-browser-warning": "true"}
+            session = await self._get_session()
+            # Fetch tracking, yesterday, and history endpoints in parallel. Only a failed
+            # or timed-out tracking request fails the group (cancelling the others); the
+            # optional requests are best-effort under their own shorter deadline.
+            async with asyncio.TaskGroup() as tg:
+                tracking_task = tg.create_task(
+                    self._fetch_json(session, "/prediction/tracking", timeout=FETCH_TIMEOUT)
                 )
-                yesterday_task = session.get(
-                    f"{self.V4_BASE_URL}/prediction/yesterday",
-                    timeout=aiohttp.ClientTimeout(total=15),
-                    headers={"ngrok-skip-browser-warning": "true"}
+                # Yesterday's curve (optional - for accuracy comparison)
+                yesterday_task = tg.create_task(
+                    self._fetch_optional(session, "/prediction/yesterday")
                 )
-                # Fetch history to get stabilized predictions (hourly snapshots)
-                history_task = session.get(
-                    f"{self.V4_BASE_URL}/history?limit=24",
-                    timeout=aiohttp.ClientTimeout(total=15),
-                    headers={"ngrok-skip-browser-warning": "true"}
+                # History to get stabilized predictions (hourly snapshots)
+                history_task = tg.create_task(
+                    self._fetch_optional(session, "/history?limit=24", project=self._project_history)
                 )
 
-                tracking_resp, yesterday_resp, history_resp = await asyncio.gather(
-                    tracking_task, yesterday_task, history_task, return_exceptions=True
-                )
+            data = tracking_task.result()
+            if data is None:
+                self.log("ERROR", f"[V4] Tracking API error")
+                return None
+
+            sources = (data, yesterday_task.result(), history_task.result())
+            # On 304 _read_json hands back the cached body object itself, so identical
+            # objects for every endpoint mean nothing changed since the last curve
+            last = self._last_transform
+            if last is not None and all(new is old for new, old in zip(sources, last[0])):
+                return self._copy_curve(last[1])
+
+            curve = self._transform_response(*sources)
+            self._last_transform = (sources, curve)
+            return curve
+
+        except ExceptionGroup as eg:
+            # Everything raised in the TaskGroup, timeouts included, arrives grouped
+            if eg.subgroup(TimeoutError) is not None:
+                self.log("WARNING", "[V4] API timeout")
+            else:
+                self.log("ERROR", f"[V4] API error: {eg.exceptions[0]}")
+            return None
+        except Exception as e:
+            self.log("ERROR", f"[V4] API error: {e}")
+            return None
 
-                # Process tracking response
-                if isinstance(tracking_resp, Exception) or tracking_resp.status != 200:
-                    self.log("ERROR", f"[V4] Tracking API error")
-                    return None
+    async def _fetch_json(
+        self,
+        session: aiohttp.ClientSession,
+        path: str,
+        project: Optional[Callable[[Any], Any]] = None,
+        timeout: float = FETCH_TIMEOUT,
+    ) -> Optional[Any]:
+        """GET a V4 endpoint and decode it (see _read_json); None on a non-200/304 status."""
+        async with asyncio.timeout(timeout):
+            async with self._conditional_get(session, path) as resp:
+                return await self._read_json(path, resp, project=project)
+
+    async def _fetch_optional(
+        self,
+        session: aiohttp.ClientSession,
+        path: str,
+        project: Optional[Callable[[Any], Any]] = None,
+    ) -> Optional[Any]:
+        """Like _fetch_json, but a failure or timeout yields None instead of failing the fetch."""
+        try:
+            return await self._fetch_json(
+                session, path, project=project, timeout=OPTIONAL_FETCH_TIMEOUT
+            )
+        except TimeoutError:
+            self.log("DEBUG", f"[V4] Optional {path} fetch timed out")
+            return None
+        except Exception as e:
+            self.log("DEBUG", f"[V4] Optional {path} fetch failed: {e}")
+            return None
 
-                data = await tracking_resp.json()
+    def _conditional_get(self, session: aiohttp.ClientSession, path: str):
+        """Start a GET that lets the server answer 304 if the cached body is still current."""
+        headers = REQUEST_HEADERS
+        cached = self._conditional_cache.get(path)
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers = {**REQUEST_HEADERS, "If-None-Match": etag}
+            else:
+                headers = {**REQUEST_HEADERS, "If-Modified-Since": last_modified}
+        return session.get(f"{self.V4_BASE_URL}{path}", headers=headers)
 
-                # Process yesterday response (optional - for accuracy comparison)
-                yesterday_data = None
-                if not isinstance(yesterday_resp, Exception) and yesterday_resp.status == 200:
-                    yesterday_data = await yesterday_resp.json()
+    async def _read_json(
+        self,
+        path: str,
+        resp: aiohttp.ClientResponse,
+        project: Optional[Callable[[Any], Any]] = None,
+    ) -> Optional[Any]:
+        """
+        Decode a 200 response, or reuse the cached body on 304; None on any other status.
 
-                # Process history response (for stabilized predictions)
-                history_data = None
-                if not isinstance(history_resp, Exception) and history_resp.status == 200:
-                    history_data = await history_resp.json()
+        project, if given, reduces the decoded body before it is cached and returned.
+        """
+        if resp.status == 304:
+            cached = self._conditional_cache.get(path)
+            return cached[2] if cached is not None else None
+        if resp.status != 200:
+            return None
 
-                return self._transform_response(data, yesterday_data, history_data)
+        body = await resp.json(loads=orjson.loads)
+        if project is not None:
+            body = project(body)
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._conditional_cache[path] = (etag, last_modified, body)
+        else:
+            self._conditional_cache.pop(path, None)
+        return body
+
+    def _project_history(self, history_data: list) -> list:
+        """
+        Keep only the history fields _extract_stabilized_from_history reads.
 
-        except asyncio.TimeoutError:
-            self.log("WARNING", "[V4] API timeout")
-            return None
-        except Exception as e:
-            self.log("ERROR", f"[V4] API error: {e}")
-            return None
+        /history returns entries oldest first. That order is checked while
+        projecting, and the result is only sorted if the check fails.
+        """
+        lean_history = []
+        in_order = True
+        previous_timestamp = ""
+        for entry in history_data:
+            timestamp = entry.get("timestamp", "")
+            if timestamp < previous_timestamp:
+                in_order = False
+            previous_timestamp = timestamp
+
+            fc = entry.get("forward_curve", {})
+            lean_entry = {
+                "forward_curve": {
+                    horizon: {"price": h_data.get("price"), "is_actual": h_data.get("is_actual", False)}
+                    for horizon in self.HORIZONS
+                    if (h_data := fc.get(horizon))
+                }
+            }
+            if "timestamp" in entry:
+                lean_entry["timestamp"] = entry["timestamp"]
+            lean_history.append(lean_entry)
+
+        if not in_order:
+            lean_history.sort(key=lambda x: x.get("timestamp", ""))
+        return lean_history
 
     def _transform_response(self, data: dict, yesterday_data: dict = None, history_data: list = None) -> dict:
         """Transform V4 API response to standard format."""
@@ -112,36 +251,24 @@ class V4CurveProvider:
         # For each horizon, find the last prediction before it became actual
         stabilized_predictions = self._extract_stabilized_from_history(history_data, forward_curve)
 
+        # Resolve every per-horizon input up front: (horizon, point, original prediction
+        # at anchor time, yesterday's prediction, stabilized prediction)
+        lookups = [
+            (
+                horizon,
+                forward_curve[horizon],
+                original_predictions.get(horizon, _EMPTY),
+                yesterday_curve.get(horizon, _EMPTY),
+                stabilized_predictions.get(horizon, _EMPTY),
+            )
+            for horizon in self.HORIZONS
+            if horizon in forward_curve
+        ]
+
         # Build curve array with all horizons
-        curve_points = []
-        for horizon in self.HORIZONS:
-            if horizon in forward_curve:
-                point = forward_curve[horizon]
-                # Get original prediction for this horizon (what model predicted at anchor time)
-                orig = original_predictions.get(horizon, {})
-                # Get yesterday's prediction for this horizon
-                yest = yesterday_curve.get(horizon, {})
-                # Get stabilized prediction (last prediction before becoming actual)
-                stab = stabilized_predictions.get(horizon, {})
-
-                curve_points.append({
-                    "horizon": horizon,  # Already has + prefix from API
-                    "target_price": point.get("price", 0),
-                    "pct_change": point.get("pct_change", 0),
-                    "lower_90": point.get("lower_90", 0),
-                    "upper_90": point.get("upper_90", 0),
-                    "is_actual": point.get("is_actual", False),
-                    # Original prediction (what model thought at 13:00 UTC)
-                    "original_price": orig.get("original_price"),
-                    "original_pct": orig.get("original_pct"),
-                    # Yesterday's prediction (what we predicted 24h ago)
-                    "yesterday_price": yest.get("price"),
-                    # Stabilized prediction (last prediction before becoming actual)
-                    "stabilized_price": stab.get("price"),
-                    "stabilized_timestamp": stab.get("timestamp"),
-                })
+        curve_points = [self._build_point(*lookup) for lookup in lookups]
 
-        return {
+        result = {
             "type": "v4_forward_curve",
             "timestamp": datetime.now(UTC).isoformat(),
             "generated_at": data.get("generated_at"),
@@ -157,6 +284,42 @@ class V4CurveProvider:
             "has_yesterday": yesterday_data is not None,
             "has_history": history_data is not None and len(history_data) > 0,
         }
+        return result
+
+    @staticmethod
+    def _build_point(horizon: str, point: dict, orig: dict, yest: dict, stab: dict) -> dict:
+        """Build one curve point from its tracking, original, yesterday and stabilized entries."""
+        return {
+            "horizon": horizon,  # Already has + prefix from API
+            "target_price": point.get("price", 0),
+            "pct_change": point.get("pct_change", 0),
+            "lower_90": point.get("lower_90", 0),
+            "upper_90": point.get("upper_90", 0),
+            "is_actual": point.get("is_actual", False),
+            # Original prediction (what model thought at 13:00 UTC)
+            "original_price": orig.get("original_price"),
+            "original_pct": orig.get("original_pct"),
+            # Yesterday's prediction (what we predicted 24h ago)
+            "yesterday_price": yest.get("price"),
+            # Stabilized prediction (last prediction before becoming actual)
+            "stabilized_price": stab.get("price"),
+            "stabilized_timestamp": stab.get("timestamp"),
+        }
+
+    @staticmethod
+    def _copy_curve(curve: dict) -> dict:
+        """
+        Copy the last curve for an unchanged poll, with a fresh timestamp.
+
+        Its points were annotated in place by _add_history_to_curve; the copy
+        drops last_stabilized_price, which is only re-added when still known.
+        """
+        points = []
+        for point in curve["curve"]:
+            point = point.copy()
+            point.pop("last_stabilized_price", None)
+            points.append(point)
+        return {**curve, "timestamp": datetime.now(UTC).isoformat(), "curve": points}
 
     def _extract_stabilized_from_history(self, history_data: list, current_curve: dict) -> dict:
         """
@@ -165,38 +328,19 @@ class V4CurveProvider:
         For each horizon that is now actual, find the last history entry
         where it was still a prediction (is_actual=False).
         That's the "stabilized" prediction - the last forecast before it became actual.
+        Expects history_data oldest first, as returned by _project_history.
         """
         stabilized = {}
 
         if not history_data:
             return stabilized
 
-        # Sort history by timestamp (oldest first)
-        sorted_history = sorted(history_data, key=lambda x: x.get("timestamp", ""))
-
+        # Horizons that are now actual and still need their last prediction
+        unresolved = set()
         for horizon in self.HORIZONS:
             current_point = current_curve.get(horizon, {})
-            is_now_actual = current_point.get("is_actual", False)
-
-            if is_now_actual:
-                # Find the last history entry where this horizon was still a prediction
-                last_prediction = None
-                last_timestamp = None
-
-                for entry in sorted_history:
-                    fc = entry.get("forward_curve", {})
-                    h_data = fc.get(horizon, {})
-
-                    # If this entry has the horizon and it's NOT actual, it's a prediction
-                    if h_data and not h_data.get("is_actual", False):
-                        last_prediction = h_data.get("price")
-                        last_timestamp = entry.get("timestamp")
-
-                if last_prediction is not None:
-                    stabilized[horizon] = {
-                        "price": last_prediction,
-                        "timestamp": last_timestamp
-                    }
+            if current_point.get("is_actual", False):
+                unresolved.add(horizon)
             else:
                 # For pending horizons, the current price IS the stabilized prediction
                 stabilized[horizon] = {
@@ -204,12 +348,35 @@ class V4CurveProvider:
                     "timestamp": None  # Current
                 }
 
+        # Walk newest to oldest: the first entry where a horizon was still a
+        # prediction (is_actual=False) is its last prediction
+        for entry in reversed(history_data):
+            if not unresolved:
+                break
+            fc = entry.get("forward_curve", {})
+            for horizon in tuple(unresolved):
+                h_data = fc.get(horizon, {})
+                if h_data and not h_data.get("is_actual", False):
+                    unresolved.discard(horizon)
+                    last_prediction = h_data.get("price")
+                    if last_prediction is not None:
+                        stabilized[horizon] = {
+                            "price": last_prediction,
+                            "timestamp": entry.get("timestamp")
+                        }
+
         return stabilized
 
+    def set_broadcast_callback(self, broadcast_callback: Callable):
+        """Set the coroutine that receives each new curve."""
+        self._broadcast_callback = broadcast_callback
+
     async def start_polling(self, broadcast_callback: Callable):
         """Start polling V4 API and broadcasting updates."""
-        self._broadcast_callback = broadcast_callback
-        self._polling_task = asyncio.create_task(self._poll_loop())
+        self.set_broadcast_callback(broadcast_callback)
+        self._polling_task = asyncio.create_task(
+            aligned_five_min_scheduler([self], log_callback=self.log)
+        )
         self.log("INFO", f"[V4] V4.32 curve polling started (interval: {self.poll_interval}s)")
 
     async def stop_polling(self):
@@ -220,109 +387,60 @@ class V4CurveProvider:
                 await self._polling_task
             except asyncio.CancelledError:
                 pass
+        # An injected session belongs to the caller, which closes it
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
         self.log("INFO", "[V4] V4.32 curve polling stopped")
 
-    async def _poll_loop(self):
-        """Poll V4 API and broadcast curve updates, aligned to 5-minute marks."""
-        import datetime as dt
-
-        while True:
-            try:
-                # Fetch and broadcast immediately
-                curve = await self.fetch_curve()
-                if curve and self._broadcast_callback:
-                    self._last_curve = curve
-                    # Store snapshot for history tracking
-                    self._store_curve_snapshot(curve)
-                    # Add history to the curve data before broadcasting
-                    curve_with_history = self._add_history_to_curve(curve)
-                    await self._broadcast_callback(curve_with_history)
-
-                # Calculate sleep time to align with next 5-minute mark
-                now = dt.datetime.now()
-                current_minute = now.minute
-                current_second = now.second
-
-                next_5min = ((current_minute // 5) + 1) * 5
-                if next_5min >= 60:
-                    next_5min = 0
-                    minutes_to_wait = (60 - current_minute) + next_5min
-                else:
-                    minutes_to_wait = next_5min - current_minute
-
-                seconds_to_wait = (minutes_to_wait * 60) - current_second + 5  # +5s offset from V5
-
-                self.log("DEBUG", f"[V4] Next poll at :{next_5min:02d}, waiting {seconds_to_wait}s")
-                await asyncio.sleep(seconds_to_wait)
-
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                self.log("ERROR", f"[V4] Poll loop error: {e}")
-                await asyncio.sleep(60)
+    async def fetch_and_broadcast(self):
+        """Fetch the current curve and broadcast it with its prediction history."""
+        curve = await self.fetch_curve()
+        if curve and self._broadcast_callback:
+            self._last_curve = curve
+            # Store snapshot for history tracking
+            self._store_curve_snapshot(curve)
+            # Add history to the curve data before broadcasting
+            self._add_history_to_curve(curve)
+            await self._broadcast_callback(curve)
 
     def _store_curve_snapshot(self, curve: dict):
         """Store a curve snapshot for history tracking."""
-        snapshot = {
-            "timestamp": datetime.now(UTC).isoformat(),
-            "hours_elapsed": curve.get("hours_elapsed", 0),
-            "anchor_timestamp": curve.get("anchor_timestamp"),
-            "predictions": {}
-        }
+        self._snapshot_seq += 1
+        seq = self._snapshot_seq
 
         # Store each horizon's prediction (only non-actuals, as those are still predictions)
         for point in curve.get("curve", []):
-            horizon = point.get("horizon")
             if not point.get("is_actual", False):
-                snapshot["predictions"][horizon] = {
-                    "price": point.get("target_price"),
-                    "original_price": point.get("original_price")
-                }
+                self._history_by_horizon[point.get("horizon")].append((seq, point.get("target_price")))
 
-        self._curve_history.append(snapshot)
-
-        # Trim to max size
-        if len(self._curve_history) > self._max_history_size:
-            self._curve_history = self._curve_history[-self._max_history_size:]
+        # Drop entries from snapshots that fell out of the retained window
+        oldest_seq = seq - self._max_history_size
+        for evolution in self._history_by_horizon.values():
+            while evolution and evolution[0][0] <= oldest_seq:
+                evolution.popleft()
 
     def _add_history_to_curve(self, curve: dict) -> dict:
-        """Add prediction evolution history to each horizon in the curve."""
-        curve_copy = curve.copy()
-        curve_copy["curve"] = []
+        """Add prediction evolution history to each horizon in the curve (in place)."""
+        # Points are built fresh by _transform_response (or copied), so they are annotated directly
+        history_by_horizon = self._history_by_horizon
+        for point in curve.get("curve", ()):
+            # Get the evolution history for this horizon
+            evolution = history_by_horizon.get(point.get("horizon"), ())
 
-        for point in curve.get("curve", []):
-            point_copy = point.copy()
-            horizon = point.get("horizon")
+            if evolution:
+                if point.get("is_actual"):
+                    # Last stabilized price: most recent prediction before it became actual
+                    point["last_stabilized_price"] = evolution[-1][1]
+                else:
+                    # For pending, show current stabilized (which is target_price)
+                    point["last_stabilized_price"] = point.get("target_price")
 
-            # Get the evolution history for this horizon
-            evolution = []
-            for snapshot in self._curve_history:
-                pred = snapshot["predictions"].get(horizon)
-                if pred:
-                    evolution.append({
-                        "timestamp": snapshot["timestamp"],
-                        "hours_elapsed": snapshot["hours_elapsed"],
-                        "price": pred["price"]
-                    })
-
-            # Add the last stabilized price (most recent prediction before it became actual)
-            if point.get("is_actual") and evolution:
-                point_copy["last_stabilized_price"] = evolution[-1]["price"]
-            elif not point.get("is_actual") and evolution:
-                # For pending, show current stabilized (which is target_price)
-                point_copy["last_stabilized_price"] = point.get("target_price")
-
-            point_copy["evolution_count"] = len(evolution)
-            curve_copy["curve"].append(point_copy)
-
-        curve_copy["history_size"] = len(self._curve_history)
-        return curve_copy
+            point["evolution_count"] = len(evolution)
+
+        curve["history_size"] = min(self._snapshot_seq, self._max_history_size)
+        return curve
 
     def get_last_curve(self) -> Optional[dict]:
         """Get the last fetched curve."""
         return self._last_curve
-
-    def get_curve_history(self) -> list[dict]:
-        """Get the stored curve history."""
-        return self._curve_history
-
@@ -7,15 +7,21 @@ Provides real-time curve data with 10 horizons from +1H to +48H.
 
 import aiohttp
 import asyncio
+import orjson
 from datetime import datetime, UTC
 from typing import Any, Optional, Callable
 import ssl
 
+from curve_scheduler import aligned_five_min_scheduler
+
 # SSL context for HTTPS requests
 SSL_CONTEXT = ssl.create_default_context()
 SSL_CONTEXT.check_hostname = False
 SSL_CONTEXT.verify_mode = ssl.CERT_NONE
 
+# Headers sent with every V5 API request
+REQUEST_HEADERS = {"ngrok-skip-browser-warning": "true"}
+
 
 class V5CurveProvider:
     """Provider for V5 Flash forward curve data."""
@@ -26,36 +32,65 @@ class V5CurveProvider:
     # Horizons in order
     HORIZONS = ["+1H", "+2H", "+4H", "+6H", "+8H", "+12H", "+18H", "+24H", "+36H", "+48H"]
 
+    # Seconds after each 5-minute mark to poll (small buffer for the model update)
+    poll_offset = 2.0
+
     def __init__(
         self,
         log_callback: Optional[Callable[[str, str], None]] = None,
         poll_interval: float = 5.0,
+        session: Optional[aiohttp.ClientSession] = None,
     ):
         self.log_callback = log_callback or (lambda level, msg: print(f"[{level}] {msg}"))
         self.poll_interval = poll_interval
         self._polling_task: Optional[asyncio.Task] = None
         self._broadcast_callback: Optional[Callable] = None
         self._last_curve: Optional[dict] = None
+        # HTTP session: injected and owned by the caller, or created lazily and
+        # closed in close()
+        self._session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
+
+    async def __aenter__(self) -> "V5CurveProvider":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop_polling()
 
     def log(self, level: str, message: str):
         self.log_callback(level, message)
 
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the HTTP session, creating an owned one on first use."""
+        if self._owns_session and (self._session is None or self._session.closed):
+            # Keep-alive connections are reused across polls instead of reconnecting each time
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(ssl=SSL_CONTEXT, limit=20, keepalive_timeout=75),
+            )
+        return self._session
+
+    async def close(self):
+        """Close the HTTP session if this provider created it."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
     async def fetch_curve(self) -> Optional[dict]:
         """Fetch current forward curve from V5 API."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.V5_BASE_URL}/prediction",
-                    timeout=aiohttp.ClientTimeout(total=10),
-                    headers={"ngrok-skip-browser-warning": "true"}
-                ) as resp:
-                    if resp.status != 200:
-                        self.log("ERROR", f"V5 API error: {resp.status}")
-                        return None
-                    
-                    data = await resp.json()
-                    return self._transform_response(data)
-                    
+            session = await self._get_session()
+            async with session.get(
+                f"{self.V5_BASE_URL}/prediction",
+                timeout=aiohttp.ClientTimeout(total=10),
+                headers=REQUEST_HEADERS,
+            ) as resp:
+                if resp.status != 200:
+                    self.log("ERROR", f"V5 API error: {resp.status}")
+                    return None
+
+                data = await resp.json(loads=orjson.loads)
+                return self._transform_response(data)
+
         except asyncio.TimeoutError:
             self.log("WARNING", "V5 API timeout")
             return None
@@ -95,23 +130,29 @@ class V5CurveProvider:
     async def fetch_summary(self) -> Optional[dict]:
         """Fetch quick summary from V5 API."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.V5_BASE_URL}/prediction/summary",
-                    timeout=aiohttp.ClientTimeout(total=10),
-                    headers={"ngrok-skip-browser-warning": "true"}
-                ) as resp:
-                    if resp.status != 200:
-                        return None
-                    return await resp.json()
+            session = await self._get_session()
+            async with session.get(
+                f"{self.V5_BASE_URL}/prediction/summary",
+                timeout=aiohttp.ClientTimeout(total=10),
+                headers=REQUEST_HEADERS,
+            ) as resp:
+                if resp.status != 200:
+                    return None
+                return await resp.json(loads=orjson.loads)
         except Exception as e:
             self.log("ERROR", f"V5 summary error: {e}")
             return None
 
+    def set_broadcast_callback(self, broadcast_callback: Callable):
+        """Set the coroutine that receives each new curve."""
+        self._broadcast_callback = broadcast_callback
+
     async def start_polling(self, broadcast_callback: Callable):
         """Start polling V5 API and broadcasting updates."""
-        self._broadcast_callback = broadcast_callback
-        self._polling_task = asyncio.create_task(self._poll_loop())
+        self.set_broadcast_callback(broadcast_callback)
+        self._polling_task = asyncio.create_task(
+            aligned_five_min_scheduler([self], log_callback=self.log)
+        )
         self.log("INFO", f"V5 curve polling started (interval: {self.poll_interval}s)")
 
     async def stop_polling(self):
@@ -122,44 +163,15 @@ class V5CurveProvider:
                 await self._polling_task
             except asyncio.CancelledError:
                 pass
+        await self.close()
         self.log("INFO", "V5 curve polling stopped")
 
-    async def _poll_loop(self):
-        """Poll V5 API and broadcast curve updates, aligned to 5-minute marks."""
-        import datetime
-
-        while True:
-            try:
-                # Fetch and broadcast immediately
-                curve = await self.fetch_curve()
-                if curve and self._broadcast_callback:
-                    self._last_curve = curve
-                    await self._broadcast_callback(curve)
-
-                # Calculate sleep time to align with next 5-minute mark
-                now = datetime.datetime.now()
-                current_minute = now.minute
-                current_second = now.second
-
-                # Find next 5-minute mark (0, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55)
-                next_5min = ((current_minute // 5) + 1) * 5
-                if next_5min >= 60:
-                    next_5min = 0
-                    minutes_to_wait = (60 - current_minute) + next_5min
-                else:
-                    minutes_to_wait = next_5min - current_minute
-
-                # Calculate seconds to wait (subtract current seconds, add small buffer)
-                seconds_to_wait = (minutes_to_wait * 60) - current_second + 2  # +2s buffer
-
-                self.log("DEBUG", f"Next poll at :{next_5min:02d}, waiting {seconds_to_wait}s")
-                await asyncio.sleep(seconds_to_wait)
-
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                self.log("ERROR", f"Poll loop error: {e}")
-                await asyncio.sleep(60)  # Wait 1 minute on error
+    async def fetch_and_broadcast(self):
+        """Fetch the current curve and broadcast it."""
+        curve = await self.fetch_curve()
+        if curve and self._broadcast_callback:
+            self._last_curve = curve
+            await self._broadcast_callback(curve)
 
     def get_last_curve(self) -> Optional[dict]:
         """Get the last fetched curve."""
@@ -46,6 +46,8 @@ export const WebSocketManager = {
 
     try {
       state.predictionWS = new WebSocket(config.predictionWsUrl);
+      // Large broadcasts arrive as pre-compressed binary frames (see inflateFrame)
+      state.predictionWS.binaryType = 'arraybuffer';
       window.predictionWS = state.predictionWS;
 
       state.predictionWS.onopen = () => {
@@ -55,31 +57,36 @@ export const WebSocketManager = {
 
       state.predictionWS.onmessage = async (msg) => {
         try {
-          const message = JSON.parse(msg.data);
-
-          if (message.type === 'trade') {
-            CandleDataManager.handleTradeMessage(message.data);
-          } else if (message.type === 'forward_curve') {
-            // Handle V5 forward curve updates
-            console.log('[WebSocket] Received V5 forward_curve update:', message.timestamp, message.current_price);
-            CurveDataManager.processCurveUpdate(message);
-          } else if (message.type === 'v4_forward_curve') {
-            // Handle V4 forward curve updates
-            console.log('[WebSocket] Received V4 forward_curve update:', message.timestamp, message.current_price);
-            CurveDataManager.processV4CurveUpdate(message);
-          } else {
-            await startActiveSpanFromTraceparent(
-              `websocket.${message.type}`,
-              async function handleWebSocketMessage() {
-                if (message.type === 'heartbeat') {
-                  // Server heartbeat - no action needed
-                } else if (message.type === 'pong') {
-                  // Silent - no logging needed for pong
-                } else {
-                  logger.trace('Received message type', { type: message.type });
-                }
-              },
-            message.trace_context);
+          const text = typeof msg.data === 'string' ? msg.data : await this.inflateFrame(msg.data);
+          const parsed = JSON.parse(text);
+          // The server merges bursts of messages into a single batch frame
+          const messages = parsed.type === 'batch' ? parsed.items : [parsed];
+
+          for (const message of messages) {
+            if (message.type === 'trade') {
+              CandleDataManager.handleTradeMessage(message.data);
+            } else if (message.type === 'forward_curve') {
+              // Handle V5 forward curve updates
+              console.log('[WebSocket] Received V5 forward_curve update:', message.timestamp, message.current_price);
+              CurveDataManager.processCurveUpdate(message);
+            } else if (message.type === 'v4_forward_curve') {
+              // Handle V4 forward curve updates
+              console.log('[WebSocket] Received V4 forward_curve update:', message.timestamp, message.current_price);
+              CurveDataManager.processV4CurveUpdate(message);
+            } else {
+              await startActiveSpanFromTraceparent(
+                `websocket.${message.type}`,
+                async function handleWebSocketMessage() {
+                  if (message.type === 'heartbeat') {
+                    // Server heartbeat - no action needed
+                  } else if (message.type === 'pong') {
+                    // Silent - no logging needed for pong
+                  } else {
+                    logger.trace('Received message type', { type: message.type });
+                  }
+                },
+              message.trace_context);
+            }
           }
         } catch (e) {
           logger.exception('WebSocket message parsing error', e);
@@ -107,6 +114,20 @@ export const WebSocketManager = {
     }
   },
 
+  /**
+   * Decodes a pre-compressed binary frame: a 1-byte type prefix (0x01)
+   * followed by a zlib stream holding the JSON text.
+   * @param {ArrayBuffer} buffer - Raw binary frame from the server
+   * @returns {Promise<string>} Decompressed JSON text
+   */
+  async inflateFrame(buffer) {
+    const bytes = new Uint8Array(buffer);
+    if (bytes[0] !== 0x01) {
+      throw new Error(`Unknown binary frame type: ${bytes[0]}`);
+    }
+    const stream = new Blob([bytes.subarray(1)]).stream().pipeThrough(new DecompressionStream('deflate'));
+    return new Response(stream).text();
+  },
 
   /**
    * Closes the WebSocket connection if it exists and prevents automatic reconnection.